@@ -0,0 +1,158 @@
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class AdmissionRejected(Exception):
+    """
+    Dilempar ketika request ditolak sebelum masuk antrian inference
+    """
+    def __init__(self, status_code, reason, retry_after):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Antrian inference terbatas dengan deadline per request dan batas per client.
+
+    Request yang tidak mungkin selesai sebelum deadline-nya ditolak lebih awal
+    (load shedding) supaya latency request yang diterima tetap terbatas.
+    """
+
+    def __init__(self, max_concurrent=1, max_queue=8, default_deadline=30.0,
+                 per_client_limit=0, initial_service_time=1.0, ewma_alpha=0.2):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.default_deadline = float(default_deadline)
+        self.per_client_limit = max(0, int(per_client_limit))
+        self.ewma_alpha = ewma_alpha
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._queue = deque()  # Ticket request yang menunggu, urutan FIFO
+        self._per_client = {}
+        self._avg_service_time = float(initial_service_time)
+
+        # Counters untuk /api/health
+        self._accepted = 0
+        self._completed = 0
+        self._shed = {
+            'queue_full': 0,
+            'deadline': 0,
+            'client_limit': 0,
+            'timeout': 0
+        }
+
+    def _estimated_wait(self, ahead):
+        """Estimasi waktu tunggu (detik) jika ada `ahead` job di depan"""
+        return (ahead / self.max_concurrent) * self._avg_service_time
+
+    def _retry_after(self):
+        backlog = self._running + len(self._queue)
+        return max(1, math.ceil(self._estimated_wait(backlog)))
+
+    def _reject(self, kind, status_code, reason):
+        self._shed[kind] += 1
+        raise AdmissionRejected(status_code, reason, self._retry_after())
+
+    def acquire(self, client_id=None, deadline=None):
+        """
+        Ambil slot inference. Memblok sampai slot tersedia atau deadline habis.
+        Melempar AdmissionRejected jika request harus ditolak.
+        """
+        deadline = self.default_deadline if deadline is None else float(deadline)
+        if not math.isfinite(deadline) or deadline <= 0:
+            raise ValueError('Deadline must be a finite number greater than 0')
+        expires_at = time.monotonic() + deadline
+
+        with self._cond:
+            if self.per_client_limit and self._per_client.get(client_id, 0) >= self.per_client_limit:
+                self._reject('client_limit', 429,
+                             f'Too many concurrent requests for this client (limit {self.per_client_limit})')
+
+            queued_ahead = len(self._queue)
+            if self._running >= self.max_concurrent and queued_ahead >= self.max_queue:
+                self._reject('queue_full', 503, 'Inference queue is full')
+
+            # Job di depan = semua yang menunggu + yang sedang jalan jika slot penuh
+            ahead = queued_ahead + max(0, self._running - self.max_concurrent + 1)
+            if self._estimated_wait(ahead) + self._avg_service_time > deadline:
+                self._reject('deadline', 503, 'Deadline cannot be met with current load')
+
+            self._per_client[client_id] = self._per_client.get(client_id, 0) + 1
+
+            # FIFO: request baru tidak boleh menyalip yang sudah menunggu
+            ticket = object()
+            self._queue.append(ticket)
+            try:
+                while self._queue[0] is not ticket or self._running >= self.max_concurrent:
+                    remaining = expires_at - time.monotonic()
+                    if remaining <= 0:
+                        self._shed['timeout'] += 1
+                        raise AdmissionRejected(503, 'Deadline expired while waiting in queue',
+                                                self._retry_after())
+                    self._cond.wait(min(remaining, threading.TIMEOUT_MAX))
+            except BaseException:
+                # Ticket tidak boleh tertinggal di antrian, apapun penyebabnya
+                self._queue.remove(ticket)
+                self._release_client(client_id)
+                self._cond.notify_all()
+                raise
+
+            self._queue.popleft()
+            self._running += 1
+            # Head baru mungkin bisa langsung jalan jika masih ada slot
+            self._cond.notify_all()
+            self._accepted += 1
+
+        return time.monotonic()
+
+    def _release_client(self, client_id):
+        count = self._per_client.get(client_id, 0) - 1
+        if count > 0:
+            self._per_client[client_id] = count
+        else:
+            self._per_client.pop(client_id, None)
+
+    def release(self, client_id=None, started_at=None):
+        """Kembalikan slot dan update rata-rata service time (EWMA)"""
+        with self._cond:
+            if started_at is not None:
+                service_time = time.monotonic() - started_at
+                self._avg_service_time = (
+                    self.ewma_alpha * service_time
+                    + (1 - self.ewma_alpha) * self._avg_service_time
+                )
+            self._running -= 1
+            self._completed += 1
+            self._release_client(client_id)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, client_id=None, deadline=None):
+        started_at = self.acquire(client_id, deadline)
+        try:
+            yield
+        finally:
+            self.release(client_id, started_at)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'running': self._running,
+                'queue_depth': len(self._queue),
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'default_deadline': self.default_deadline,
+                'per_client_limit': self.per_client_limit,
+                'avg_service_time': round(self._avg_service_time * 1000, 2),  # milliseconds
+                'accepted': self._accepted,
+                'completed': self._completed,
+                'shed': dict(self._shed),
+                'shed_total': sum(self._shed.values())
+            }
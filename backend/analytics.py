@@ -0,0 +1,173 @@
+import threading
+import time
+
+CONFIDENCE_BINS = 10  # Histogram confidence 0.0-1.0 dengan lebar bin 0.1
+
+# name: (lebar bucket dalam detik, jumlah bucket)
+WINDOWS = {
+    'minute': (1, 60),
+    'hour': (60, 60),
+    'day': (3600, 24)
+}
+
+
+def _confidence_bin(confidence):
+    return min(int(confidence * CONFIDENCE_BINS), CONFIDENCE_BINS - 1)
+
+
+class _Bucket:
+    __slots__ = ('index', 'images', 'detections', 'class_counts', 'confidence_histogram')
+
+    def __init__(self):
+        self.index = None
+        self.reset(None)
+
+    def reset(self, index):
+        self.index = index
+        self.images = 0
+        self.detections = 0
+        self.class_counts = {}
+        self.confidence_histogram = [0] * CONFIDENCE_BINS
+
+
+class RollingWindow:
+    """
+    Ring buffer berukuran tetap untuk satu window waktu.
+
+    Total window di-maintain secara incremental: bucket yang keluar dari window
+    dikurangkan dari total, jadi update dan read tidak bergantung pada jumlah
+    gambar yang sudah diproses.
+    """
+
+    def __init__(self, bucket_seconds, num_buckets):
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self._buckets = [_Bucket() for _ in range(num_buckets)]
+        self._head = None  # Index bucket terbaru
+        self._totals = _Bucket()
+
+    def _expire(self, bucket):
+        totals = self._totals
+        totals.images -= bucket.images
+        totals.detections -= bucket.detections
+        for class_name, count in bucket.class_counts.items():
+            remaining = totals.class_counts[class_name] - count
+            if remaining:
+                totals.class_counts[class_name] = remaining
+            else:
+                del totals.class_counts[class_name]
+        for i, count in enumerate(bucket.confidence_histogram):
+            totals.confidence_histogram[i] -= count
+
+    def advance(self, now):
+        """Geser window ke waktu `now`, buang bucket yang sudah kadaluarsa"""
+        index = int(now // self.bucket_seconds)
+        if self._head is not None and index <= self._head:
+            return
+
+        start = index - self.num_buckets + 1
+        if self._head is not None:
+            start = max(start, self._head + 1)
+
+        for i in range(start, index + 1):
+            bucket = self._buckets[i % self.num_buckets]
+            if bucket.index is not None:
+                self._expire(bucket)
+            bucket.reset(i)
+
+        self._head = index
+
+    def record(self, now, class_confidences):
+        self.advance(now)
+        bucket = self._buckets[self._head % self.num_buckets]
+
+        for target in (bucket, self._totals):
+            target.images += 1
+            target.detections += len(class_confidences)
+            for class_name, confidence in class_confidences:
+                target.class_counts[class_name] = target.class_counts.get(class_name, 0) + 1
+                target.confidence_histogram[_confidence_bin(confidence)] += 1
+
+    def snapshot(self, now, include_series=True):
+        self.advance(now)
+        totals = self._totals
+        data = {
+            'bucket_seconds': self.bucket_seconds,
+            'num_buckets': self.num_buckets,
+            'total_images': totals.images,
+            'total_detections': totals.detections,
+            'class_counts': dict(totals.class_counts),
+            'confidence_histogram': list(totals.confidence_histogram)
+        }
+
+        if include_series:
+            series = []
+            for i in range(self._head - self.num_buckets + 1, self._head + 1):
+                bucket = self._buckets[i % self.num_buckets]
+                active = bucket.index == i
+                series.append({
+                    'start': i * self.bucket_seconds,
+                    'images': bucket.images if active else 0,
+                    'detections': bucket.detections if active else 0
+                })
+            data['series'] = series
+
+        return data
+
+
+class DetectionAnalytics:
+    """
+    Agregat rolling dari hasil inference (per class, histogram confidence,
+    deteksi per bucket waktu) untuk window 1 menit, 1 jam dan 1 hari
+    """
+
+    def __init__(self, windows=None):
+        self._lock = threading.Lock()
+        self._windows = {
+            name: RollingWindow(bucket_seconds, num_buckets)
+            for name, (bucket_seconds, num_buckets) in (windows or WINDOWS).items()
+        }
+        self._lifetime = _Bucket()
+
+    @property
+    def window_names(self):
+        return list(self._windows)
+
+    def record(self, result, now=None):
+        """Tambahkan satu hasil run_inference ke semua window"""
+        now = time.time() if now is None else now
+        class_confidences = [
+            (prediction['class'], prediction['confidence'])
+            for prediction in result.get('predictions', [])
+        ]
+
+        with self._lock:
+            for window in self._windows.values():
+                window.record(now, class_confidences)
+
+            lifetime = self._lifetime
+            lifetime.images += 1
+            lifetime.detections += len(class_confidences)
+            for class_name, _ in class_confidences:
+                lifetime.class_counts[class_name] = lifetime.class_counts.get(class_name, 0) + 1
+
+    def snapshot(self, window=None, include_series=True, now=None):
+        now = time.time() if now is None else now
+        names = [window] if window else list(self._windows)
+
+        with self._lock:
+            return {
+                'windows': {
+                    name: self._windows[name].snapshot(now, include_series)
+                    for name in names
+                },
+                'lifetime': {
+                    'total_images': self._lifetime.images,
+                    'total_detections': self._lifetime.detections,
+                    'class_counts': dict(self._lifetime.class_counts)
+                },
+                'confidence_bins': [
+                    round(i / CONFIDENCE_BINS, 2) for i in range(CONFIDENCE_BINS + 1)
+                ],
+                'timestamp': now
+            }
@@ -3,10 +3,17 @@ from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 import os
 import traceback
+import threading
+import math
+import time
 from datetime import datetime
 from inference import run_inference, get_model_info  # Import get_model_info juga
+from admission import AdmissionController, AdmissionRejected
+from analytics import DetectionAnalytics
+from chunked_upload import ChunkedUploadManager, UploadError
 
 UPLOAD_FOLDER = 'uploads'
+CHUNK_FOLDER = 'upload_chunks'  # Chunk upload & hash index, tidak di-serve
 OUTPUT_FOLDER = 'static'
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'mp4', 'avi', 'webp', 'bmp'}
 
@@ -25,9 +32,87 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 confidence_threshold = 0.3
 iou_threshold = 0.5
 
+# Admission control untuk /inference
+INFERENCE_MAX_CONCURRENT = 1      # Jumlah inference yang jalan bersamaan
+INFERENCE_MAX_QUEUE = 8           # Maksimal request yang menunggu di antrian
+INFERENCE_DEADLINE = 30.0         # Deadline default per request (detik)
+INFERENCE_PER_CLIENT_LIMIT = 0    # Maksimal request bersamaan per client (0 = tanpa batas)
+# Pakai header X-Client-Id sebagai identitas client. Aktifkan HANYA jika server
+# berada di belakang proxy/auth layer terpercaya yang mengisi header tersebut.
+TRUST_CLIENT_ID_HEADER = False
+
+admission = AdmissionController(
+    max_concurrent=INFERENCE_MAX_CONCURRENT,
+    max_queue=INFERENCE_MAX_QUEUE,
+    default_deadline=INFERENCE_DEADLINE,
+    per_client_limit=INFERENCE_PER_CLIENT_LIMIT
+)
+
+# Chunked/resumable upload untuk file besar (video)
+CHUNK_SIZE = 8 * 1024 * 1024      # Default ukuran chunk (8MB)
+MAX_UPLOAD_SIZE = 2 * 1024 ** 3   # Maksimal ukuran file chunked upload (2GB)
+MAX_UPLOAD_SESSIONS = 32          # Maksimal upload session aktif bersamaan
+
+chunked_uploads = ChunkedUploadManager(
+    UPLOAD_FOLDER,
+    CHUNK_FOLDER,
+    default_chunk_size=CHUNK_SIZE,
+    max_chunk_size=app.config['MAX_CONTENT_LENGTH'],
+    max_file_size=MAX_UPLOAD_SIZE,
+    max_sessions=MAX_UPLOAD_SESSIONS
+)
+
+# Rolling analytics hasil deteksi
+ANALYTICS_PUSH = True             # Kirim update analytics via WebSocket
+ANALYTICS_PUSH_INTERVAL = 1.0     # Minimal jarak antar push (detik)
+
+analytics = DetectionAnalytics()
+last_analytics_push = 0.0
+analytics_push_scheduled = False  # Trailing push sudah dijadwalkan
+analytics_push_lock = threading.Lock()
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def emit_analytics():
+    global last_analytics_push
+    
+    with analytics_push_lock:
+        last_analytics_push = time.monotonic()
+    socketio.emit('analytics_updated', analytics.snapshot(include_series=False))
+
+def deferred_analytics_push(delay):
+    """Trailing push: kirim update yang tertahan throttle di akhir interval"""
+    global analytics_push_scheduled
+    
+    socketio.sleep(delay)
+    with analytics_push_lock:
+        analytics_push_scheduled = False
+    emit_analytics()
+
+def push_analytics():
+    """
+    Broadcast ringkasan analytics (tanpa series), maksimal sekali per
+    ANALYTICS_PUSH_INTERVAL. Update di dalam interval tidak hilang: satu push
+    dijadwalkan di akhir interval.
+    """
+    global analytics_push_scheduled
+    
+    if not ANALYTICS_PUSH:
+        return
+    
+    with analytics_push_lock:
+        if analytics_push_scheduled:
+            return
+        
+        remaining = last_analytics_push + ANALYTICS_PUSH_INTERVAL - time.monotonic()
+        if remaining > 0:
+            analytics_push_scheduled = True
+            socketio.start_background_task(deferred_analytics_push, remaining)
+            return
+    
+    emit_analytics()
+
 def log_error(error_msg, exception=None):
     """Helper function untuk logging error"""
     timestamp = datetime.now().isoformat()
@@ -89,6 +174,134 @@ def upload_file():
             'error': f'Upload error: {str(ex)}'
         }), 500
 
+# 1b. Chunked upload: initiate
+@app.route('/upload/initiate', methods=['POST'])
+def initiate_upload():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({
+                'success': False,
+                'error': 'No JSON data provided'
+            }), 400
+        
+        filename = data.get('filename')
+        if not filename or not allowed_file(filename):
+            return jsonify({
+                'success': False,
+                'error': f'File type not allowed. Supported: {", ".join(ALLOWED_EXTENSIONS)}'
+            }), 400
+        
+        if 'file_size' not in data:
+            return jsonify({
+                'success': False,
+                'error': 'file_size is required'
+            }), 400
+        
+        result = chunked_uploads.initiate(
+            filename,
+            data['file_size'],
+            chunk_size=data.get('chunk_size'),
+            sha256=data.get('sha256')
+        )
+        
+        if result['complete']:
+            # Hash sudah dikenal server: tidak perlu transfer, pakai file yang sudah ada
+            socketio.emit('file_uploaded', {
+                'filename': result['filename'],
+                'file_size': result['file_size'],
+                'message': f'File {result["filename"]} uploaded successfully'
+            })
+        
+        return jsonify({'success': True, **result}), 200
+        
+    except UploadError as ue:
+        return jsonify({'success': False, 'error': ue.message}), ue.status_code
+    except (ValueError, TypeError) as ve:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid parameter values: {str(ve)}'
+        }), 400
+    except Exception as ex:
+        log_error('Initiate upload error', ex)
+        return jsonify({
+            'success': False,
+            'error': f'Upload error: {str(ex)}'
+        }), 500
+
+# 1c. Chunked upload: kirim satu chunk (body = raw bytes, boleh paralel)
+@app.route('/upload/<upload_id>/chunk/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    try:
+        # request.stream dibaca bertahap, body tidak pernah di-load utuh ke memory
+        status = chunked_uploads.write_chunk(
+            upload_id, index, request.stream, request.content_length
+        )
+        
+        socketio.emit('upload_progress', {
+            'upload_id': upload_id,
+            'filename': status['filename'],
+            'received_bytes': status['received_bytes'],
+            'file_size': status['file_size'],
+            'progress': status['progress']
+        })
+        
+        return jsonify({'success': True, **status}), 200
+        
+    except UploadError as ue:
+        return jsonify({'success': False, 'error': ue.message}), ue.status_code
+    except Exception as ex:
+        log_error('Chunk upload error', ex)
+        return jsonify({
+            'success': False,
+            'error': f'Upload error: {str(ex)}'
+        }), 500
+
+# 1d. Chunked upload: status (untuk resume, chunk mana yang sudah diterima)
+@app.route('/upload/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    try:
+        session = chunked_uploads.get_session(upload_id)
+        return jsonify({'success': True, **session.status()}), 200
+    except UploadError as ue:
+        return jsonify({'success': False, 'error': ue.message}), ue.status_code
+
+# 1e. Chunked upload: finalize
+@app.route('/upload/<upload_id>/finalize', methods=['POST'])
+def finalize_upload(upload_id):
+    try:
+        result = chunked_uploads.finalize(upload_id)
+        
+        socketio.emit('file_uploaded', {
+            'filename': result['filename'],
+            'file_size': result['file_size'],
+            'message': f'File {result["filename"]} uploaded successfully'
+        })
+        
+        return jsonify({
+            'success': True,
+            **result,
+            'message': 'File uploaded successfully'
+        }), 200
+        
+    except UploadError as ue:
+        return jsonify({'success': False, 'error': ue.message}), ue.status_code
+    except Exception as ex:
+        log_error('Finalize upload error', ex)
+        return jsonify({
+            'success': False,
+            'error': f'Upload error: {str(ex)}'
+        }), 500
+
+# 1f. Chunked upload: batalkan
+@app.route('/upload/<upload_id>', methods=['DELETE'])
+def abort_upload(upload_id):
+    try:
+        chunked_uploads.abort(upload_id)
+        return jsonify({'success': True, 'message': 'Upload aborted'}), 200
+    except UploadError as ue:
+        return jsonify({'success': False, 'error': ue.message}), ue.status_code
+
 # 2. Inference endpoint - FIXED VERSION
 @app.route('/inference', methods=['POST'])
 def do_inference():
@@ -125,6 +338,16 @@ def do_inference():
                 'error': 'IoU threshold must be between 0.0 and 1.0'
             }), 400
         
+        deadline = data.get('deadline')
+        deadline = float(deadline) if deadline is not None else None
+        if deadline is not None and (not math.isfinite(deadline) or deadline <= 0):
+            return jsonify({
+                'success': False,
+                'error': 'Deadline must be a finite number greater than 0'
+            }), 400
+        if deadline is not None:
+            deadline = min(deadline, INFERENCE_DEADLINE)
+        
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         
         if not os.path.exists(filepath):
@@ -133,16 +356,35 @@ def do_inference():
                 'error': 'File not found'
             }), 404
         
-        # Emit WebSocket event untuk notifikasi start processing
-        socketio.emit('inference_started', {
-            'filename': filename,
-            'conf': conf,
-            'iou': iou,
-            'message': 'Starting inference...'
-        })
+        # Client diidentifikasi lewat IP; header hanya dipercaya jika dikonfigurasi
+        client_id = request.remote_addr
+        if TRUST_CLIENT_ID_HEADER:
+            client_id = request.headers.get('X-Client-Id') or client_id
         
-        # ✅ FIXED: Gunakan format baru - hanya 1 return value
-        result = run_inference(filepath, conf, iou)
+        try:
+            started_at = admission.acquire(client_id, deadline)
+        except AdmissionRejected as rej:
+            response = jsonify({
+                'success': False,
+                'error': rej.reason,
+                'retry_after': rej.retry_after
+            })
+            response.headers['Retry-After'] = str(rej.retry_after)
+            return response, rej.status_code
+        
+        try:
+            # Emit WebSocket event untuk notifikasi start processing
+            socketio.emit('inference_started', {
+                'filename': filename,
+                'conf': conf,
+                'iou': iou,
+                'message': 'Starting inference...'
+            })
+            
+            # ✅ FIXED: Gunakan format baru - hanya 1 return value
+            result = run_inference(filepath, conf, iou)
+        finally:
+            admission.release(client_id, started_at)
         
         # Check jika inference berhasil
         if not result.get("success", False):
@@ -156,6 +398,9 @@ def do_inference():
             
             return jsonify(result), 500
         
+        analytics.record(result)
+        push_analytics()
+        
         # Emit WebSocket event untuk notifikasi selesai
         socketio.emit('inference_completed', {
             'filename': filename,
@@ -201,6 +446,13 @@ def do_inference():
 # 3. Get uploaded file
 @app.route('/uploads/<filename>')
 def uploaded_files(filename):
+    # File tersembunyi (dotfile) bukan hasil upload, jangan di-serve
+    if filename.startswith('.'):
+        return jsonify({
+            'success': False,
+            'error': 'File not found'
+        }), 404
+    
     try:
         return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
     except FileNotFoundError:
@@ -255,6 +507,7 @@ def health_check():
                 'confidence': confidence_threshold,
                 'iou': iou_threshold
             },
+            'inference_queue': admission.stats(),
             'timestamp': datetime.now().isoformat()
         })
     except Exception as e:
@@ -265,7 +518,24 @@ def health_check():
             'timestamp': datetime.now().isoformat()
         }), 500
 
-# 7. Get current thresholds
+# 7. Detection analytics endpoint
+@app.route('/api/analytics', methods=['GET'])
+def get_analytics():
+    window = request.args.get('window')
+    if window and window not in analytics.window_names:
+        return jsonify({
+            'success': False,
+            'error': f'Invalid window. Supported: {", ".join(analytics.window_names)}'
+        }), 400
+    
+    include_series = request.args.get('series', 'true').lower() != 'false'
+    
+    return jsonify({
+        'success': True,
+        **analytics.snapshot(window, include_series)
+    })
+
+# 8. Get current thresholds
 @app.route('/api/thresholds', methods=['GET'])
 def get_thresholds():
     return jsonify({
@@ -273,7 +543,7 @@ def get_thresholds():
         'iou': iou_threshold
     })
 
-# 8. Set thresholds via HTTP (alternative to WebSocket)
+# 9. Set thresholds via HTTP (alternative to WebSocket)
 @app.route('/api/thresholds', methods=['POST'])
 def set_thresholds_http():
     try:
@@ -370,6 +640,15 @@ def set_threshold(data):
         log_error('WebSocket set_threshold error', e)
         emit('error', {'message': f'Error setting threshold: {str(e)}'})
 
+@socketio.on('get_analytics')
+def handle_get_analytics(data=None):
+    window = (data or {}).get('window')
+    if window and window not in analytics.window_names:
+        emit('error', {'message': f'Invalid analytics window: {window}'})
+        return
+    
+    emit('analytics_updated', analytics.snapshot(window, include_series=True))
+
 @socketio.on('get_status')
 def handle_get_status():
     try:
@@ -401,7 +680,7 @@ def handle_get_status():
 def too_large(e):
     return jsonify({
         'success': False,
-        'error': f'File too large. Maximum size is {app.config["MAX_CONTENT_LENGTH"] / (1024*1024):.1f}MB'
+        'error': f'File too large. Maximum size is {app.config["MAX_CONTENT_LENGTH"] / (1024*1024):.1f}MB, use /upload/initiate for chunked upload'
     }), 413
 
 @app.errorhandler(404)
@@ -411,11 +690,16 @@ def not_found(e):
         'error': 'Endpoint not found',
         'available_endpoints': [
             '/upload (POST)',
+            '/upload/initiate (POST)',
+            '/upload/<upload_id>/chunk/<index> (PUT)',
+            '/upload/<upload_id> (GET/DELETE)',
+            '/upload/<upload_id>/finalize (POST)',
             '/inference (POST)', 
             '/uploads/<filename> (GET)',
             '/static/<filename> (GET)',
             '/api/model-info (GET)',
             '/api/health (GET)',
+            '/api/analytics (GET)',
             '/api/thresholds (GET/POST)'
         ]
     }), 404
@@ -0,0 +1,465 @@
+"""
+Offline bulk processing: jalankan detector di banyak gambar/video tanpa lewat HTTP.
+
+Contoh:
+    python bulk.py /data/captures -o detections.jsonl --workers 8
+    python bulk.py --file-list files.txt -o out_parquet --format parquet
+
+Run yang crash bisa dilanjutkan: file yang sudah selesai dicatat di checkpoint
+dan dilewati saat command yang sama dijalankan lagi.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from tqdm import tqdm
+
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'webp', 'bmp'}
+VIDEO_EXTENSIONS = {'mp4', 'avi'}
+
+# Schema output: satu baris per deteksi, (nama kolom, tipe pyarrow)
+COLUMNS = [
+    ('source', 'string'),
+    ('frame', 'int64'),
+    ('class_id', 'int32'),
+    ('class', 'string'),
+    ('confidence', 'float64'),
+    ('x1', 'float64'),
+    ('y1', 'float64'),
+    ('x2', 'float64'),
+    ('y2', 'float64'),
+    ('image_width', 'int32'),
+    ('image_height', 'int32')
+]
+
+# State per worker process (diisi oleh _init_worker)
+_model = None
+_labels = None
+_classes = None
+
+
+def _extension(path):
+    return os.path.splitext(path)[1].lstrip('.').lower()
+
+
+def collect_sources(inputs, file_list=None):
+    """
+    Kumpulkan semua file gambar/video dari direktori (rekursif), file tunggal,
+    dan/atau file list (satu path per baris)
+    """
+    allowed = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+    candidates = list(inputs)
+
+    if file_list:
+        with open(file_list, encoding='utf-8') as f:
+            candidates.extend(line.strip() for line in f if line.strip())
+
+    sources = []
+    for path in candidates:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if _extension(name) in allowed:
+                        sources.append(os.path.join(root, name))
+        elif _extension(path) in allowed:
+            sources.append(path)
+        else:
+            print(f"Warning: Skipping unsupported input {path}")
+
+    # Hilangkan duplikat, pertahankan urutan
+    return list(dict.fromkeys(os.path.abspath(p) for p in sources))
+
+
+def _init_worker(threads):
+    """Load model sekali per worker process"""
+    global _model, _labels, _classes
+    import inference
+    if inference.INFERENCE_BACKEND != 'stub':
+        import torch
+        torch.set_num_threads(threads)
+
+    _model = inference.model
+    _labels = inference.CUSTOM_LABELS
+    _classes = inference.MODEL_CLASSES
+
+
+def _detections_from_result(result, source, frame, conf):
+    rows = []
+    height, width = result.orig_shape[:2]
+
+    if result.boxes is None or len(result.boxes) == 0:
+        return rows
+
+    for box in result.boxes:
+        cls_id = int(box.cls[0])
+        conf_score = float(box.conf[0])
+
+        if cls_id not in _labels or conf_score < conf:
+            continue
+
+        x1, y1, x2, y2 = [float(x) for x in box.xyxy[0]]
+        rows.append({
+            'source': source,
+            'frame': frame,
+            'class_id': cls_id,
+            'class': _labels[cls_id],
+            'confidence': round(conf_score, 3),
+            'x1': round(x1, 1),
+            'y1': round(y1, 1),
+            'x2': round(x2, 1),
+            'y2': round(y2, 1),
+            'image_width': width,
+            'image_height': height
+        })
+
+    return rows
+
+
+def process_source(source, conf, iou, frame_stride):
+    """
+    Jalankan detector di satu file. Return (source, rows, error)
+    """
+    import cv2
+
+    try:
+        model_conf = min(conf, 0.999)
+        rows = []
+
+        if _extension(source) in VIDEO_EXTENSIONS:
+            capture = cv2.VideoCapture(source)
+            if not capture.isOpened():
+                raise ValueError(f"Could not open video {source}")
+            try:
+                frame_index = 0
+                while True:
+                    ok, frame = capture.read()
+                    if not ok:
+                        break
+                    if frame_index % frame_stride == 0:
+                        result = _model(frame, conf=model_conf, iou=iou, classes=_classes, verbose=False)[0]
+                        rows.extend(_detections_from_result(result, source, frame_index, conf))
+                    frame_index += 1
+            finally:
+                capture.release()
+        else:
+            img = cv2.imread(source)
+            if img is None:
+                raise ValueError(f"Could not load image from {source}")
+            result = _model(img, conf=model_conf, iou=iou, classes=_classes, verbose=False)[0]
+            rows = _detections_from_result(result, source, 0, conf)
+
+        return source, rows, None
+
+    except Exception as e:
+        return source, [], str(e)
+
+
+class DetectionWriter:
+    """
+    Tulis deteksi ke JSONL (append ke satu file) atau Parquet
+    (satu part file per flush di dalam direktori output).
+
+    `write` mengembalikan posisi output setelah batch ditulis (byte offset
+    JSONL atau nomor part Parquet berikutnya). Posisi ini disimpan di
+    checkpoint, dan `resume` membuang semua output setelah posisi tersebut.
+    """
+
+    def __init__(self, output, fmt):
+        self.output = output
+        self.fmt = fmt
+        self._part = 0
+
+        if fmt == 'parquet':
+            try:
+                import pyarrow as pa
+            except ImportError:
+                raise SystemExit("Parquet output requires pyarrow (pip install pyarrow)")
+            # Schema tetap supaya semua part file konsisten
+            self._schema = pa.schema([(name, getattr(pa, type_name)()) for name, type_name in COLUMNS])
+            os.makedirs(output, exist_ok=True)
+        else:
+            parent = os.path.dirname(os.path.abspath(output))
+            os.makedirs(parent, exist_ok=True)
+
+    def resume(self, position):
+        """Buang output yang ditulis setelah batch terakhir yang tercatat di checkpoint"""
+        position = position or 0
+
+        if self.fmt == 'parquet':
+            self._part = position
+            for name in os.listdir(self.output):
+                if name.endswith('.parquet.tmp'):
+                    os.remove(os.path.join(self.output, name))
+                elif name.startswith('part-') and name.endswith('.parquet'):
+                    if int(name[len('part-'):-len('.parquet')]) >= position:
+                        os.remove(os.path.join(self.output, name))
+        elif os.path.exists(self.output) and os.path.getsize(self.output) > position:
+            # Potong baris parsial / batch yang belum ter-checkpoint
+            with open(self.output, 'r+b') as f:
+                f.truncate(position)
+
+    def write(self, rows):
+        if self.fmt == 'parquet':
+            if rows:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pylist(rows, schema=self._schema)
+                path = os.path.join(self.output, f"part-{self._part:05d}.parquet")
+                tmp_path = path + '.tmp'
+                pq.write_table(table, tmp_path)
+                os.replace(tmp_path, path)
+                self._part += 1
+            return self._part
+
+        with open(self.output, 'a', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps({name: row[name] for name, _ in COLUMNS}) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+            return f.tell()
+
+
+class Checkpoint:
+    """
+    Log JSONL berisi batch yang sudah ter-commit
+    (`{"sources": [...], "position": ...}`) dan file yang membuat worker crash
+    (`{"failed": ..., "error": ...}`)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self.failed = set()
+        self.position = None
+
+        if not os.path.exists(path):
+            return
+
+        valid_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Baris terakhir parsial karena crash saat menulis checkpoint
+                    break
+                valid_size += len(line)
+                if 'failed' in record:
+                    self.failed.add(record['failed'])
+                else:
+                    self.done.update(record['sources'])
+                    self.position = record['position']
+
+        if valid_size < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(valid_size)
+
+    def _append(self, record):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def mark(self, sources, position):
+        if not sources:
+            return
+        self._append({'sources': sources, 'position': position})
+        self.done.update(sources)
+        self.position = position
+
+    def mark_failed(self, source, error):
+        self._append({'failed': source, 'error': error})
+        self.failed.add(source)
+
+
+def run_bulk(sources, writer, checkpoint, workers, conf=0.3, iou=0.5,
+             frame_stride=1, flush_every=50, threads_per_worker=1):
+    """
+    Proses semua source dengan process pool. Deteksi ditulis lalu source
+    dicatat di checkpoint setiap `flush_every` file selesai. Saat resume,
+    output setelah batch terakhir yang tercatat dibuang lalu diproses ulang,
+    jadi tidak ada baris duplikat atau baris rusak.
+
+    Jika worker crash (mis. segfault di cv2), pool dibuat ulang dan file yang
+    sedang diproses dijalankan ulang satu per satu untuk mencari penyebabnya.
+    File tersebut dicatat sebagai failed dan dilewati saat resume.
+    """
+    writer.resume(checkpoint.position)
+
+    pending = [s for s in sources if s not in checkpoint.done and s not in checkpoint.failed]
+    skipped = len(sources) - len(pending)
+    if skipped:
+        print(f"Resuming: {skipped} files already processed "
+              f"({len(checkpoint.failed)} failed), {len(pending)} remaining")
+
+    stats = {'files': 0, 'detections': 0, 'errors': 0, 'crashed': 0}
+    buffer_rows = []
+    buffer_sources = []
+
+    def flush():
+        # Urutan penting: tulis deteksi dulu, baru checkpoint
+        if not buffer_sources:
+            return
+        position = writer.write(buffer_rows)
+        checkpoint.mark(list(buffer_sources), position)
+        buffer_rows.clear()
+        buffer_sources.clear()
+
+    context = multiprocessing.get_context('spawn')
+    max_in_flight = workers * 4
+    source_iter = iter(pending)
+
+    def make_executor():
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=_init_worker, initargs=(threads_per_worker,))
+
+    executor = make_executor()
+    in_flight = {}  # future -> source
+    suspects = deque()  # File yang sedang diproses saat pool crash
+    consecutive_crashes = 0
+
+    def submit(source):
+        in_flight[executor.submit(process_source, source, conf, iou, frame_stride)] = source
+
+    def submit_next():
+        if suspects:
+            # Jalankan suspect sendirian supaya crash berikutnya jelas penyebabnya
+            if not in_flight:
+                submit(suspects.popleft())
+            return
+        for source in source_iter:
+            submit(source)
+            if len(in_flight) >= max_in_flight:
+                break
+
+    try:
+        with tqdm(total=len(pending), unit='file') as progress:
+            submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                crashed = []
+
+                for future in done:
+                    source = in_flight.pop(future)
+                    try:
+                        _, rows, error = future.result()
+                    except BrokenProcessPool:
+                        crashed.append(source)
+                        continue
+
+                    consecutive_crashes = 0
+                    if error:
+                        # Tidak dicatat di checkpoint supaya dicoba lagi saat resume
+                        stats['errors'] += 1
+                        tqdm.write(f"[{datetime.now().isoformat()}] ERROR: {source}: {error}")
+                    else:
+                        stats['files'] += 1
+                        stats['detections'] += len(rows)
+                        buffer_rows.extend(rows)
+                        buffer_sources.append(source)
+
+                    progress.update(1)
+
+                if crashed:
+                    # Semua future lain di pool yang sama juga ikut gagal
+                    crashed.extend(in_flight.values())
+                    in_flight.clear()
+                    executor.shutdown(wait=False, cancel_futures=True)
+
+                    consecutive_crashes += 1
+                    if consecutive_crashes >= 3 and stats['files'] == 0 and stats['errors'] == 0:
+                        # Belum pernah ada file yang selesai: kemungkinan worker gagal start
+                        raise RuntimeError('Worker pool keeps crashing before processing any file')
+
+                    if len(crashed) == 1:
+                        source = crashed[0]
+                        stats['crashed'] += 1
+                        checkpoint.mark_failed(source, 'worker process crashed')
+                        tqdm.write(f"[{datetime.now().isoformat()}] ERROR: {source}: worker process crashed, skipping")
+                        progress.update(1)
+                    else:
+                        suspects.extend(crashed)
+
+                    executor = make_executor()
+
+                progress.set_postfix(detections=stats['detections'],
+                                     errors=stats['errors'], crashed=stats['crashed'])
+
+                if len(buffer_sources) >= flush_every:
+                    flush()
+                submit_next()
+    finally:
+        flush()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run YOLO detection over image/video archives')
+    parser.add_argument('inputs', nargs='*', help='Directories or files to process')
+    parser.add_argument('--file-list', help='Text file with one image/video path per line')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Output .jsonl file, or output directory for parquet')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default=None,
+                        help='Output format (default: inferred from output path)')
+    parser.add_argument('--checkpoint',
+                        help='Checkpoint file (default: <output>.checkpoint). Output written after '
+                             'the last checkpointed batch is discarded on resume')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--conf', type=float, default=0.3)
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--frame-stride', type=int, default=1,
+                        help='Process every N-th frame of videos')
+    parser.add_argument('--flush-every', type=int, default=50,
+                        help='Write output and checkpoint every N files')
+    args = parser.parse_args(argv)
+
+    if not args.inputs and not args.file_list:
+        parser.error('Provide at least one input path or --file-list')
+    if not (0.0 <= args.conf <= 1.0):
+        parser.error('Confidence threshold must be between 0.0 and 1.0')
+    if not (0.0 <= args.iou <= 1.0):
+        parser.error('IoU threshold must be between 0.0 and 1.0')
+    if args.frame_stride < 1 or args.workers < 1 or args.flush_every < 1:
+        parser.error('--frame-stride, --workers and --flush-every must be >= 1')
+
+    fmt = args.format or ('jsonl' if args.output.endswith('.jsonl') else 'parquet')
+    checkpoint_path = args.checkpoint or args.output.rstrip('/\\') + '.checkpoint'
+
+    sources = collect_sources(args.inputs, args.file_list)
+    if not sources:
+        print("No images or videos found")
+        return 1
+
+    start_time = time.time()
+    stats = run_bulk(
+        sources,
+        DetectionWriter(args.output, fmt),
+        Checkpoint(checkpoint_path),
+        workers=args.workers,
+        conf=args.conf,
+        iou=args.iou,
+        frame_stride=args.frame_stride,
+        flush_every=args.flush_every,
+        threads_per_worker=args.threads_per_worker
+    )
+    total_time = time.time() - start_time
+
+    print(f"Processed {stats['files']} files, {stats['detections']} detections, "
+          f"{stats['errors']} errors, {stats['crashed']} crashed in {total_time:.1f}s")
+    return 1 if stats['errors'] or stats['crashed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
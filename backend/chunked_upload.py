@@ -0,0 +1,368 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+READ_BLOCK_SIZE = 1024 * 1024  # Stream ke/dari disk per 1MB, memory tetap kecil
+
+
+class UploadError(Exception):
+    """
+    Dilempar untuk request upload yang tidak valid, dengan status HTTP-nya
+    """
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class _UploadSession:
+    def __init__(self, upload_id, filename, file_size, chunk_size, sha256=None,
+                 received=None, created_at=None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.file_size = file_size
+        self.chunk_size = chunk_size
+        self.sha256 = sha256
+        self.received = set(received or [])
+        self.writing = set()  # Chunk yang sedang ditulis
+        self.created_at = created_at or time.time()
+        self.total_chunks = max(1, -(-file_size // chunk_size))
+
+        # Hash dihitung incremental untuk prefix chunk yang sudah lengkap
+        self.lock = threading.Lock()
+        self.hasher = hashlib.sha256()
+        self.hashed_chunks = 0
+
+    def chunk_length(self, index):
+        if index == self.total_chunks - 1:
+            return self.file_size - index * self.chunk_size
+        return self.chunk_size
+
+    @property
+    def received_bytes(self):
+        return sum(self.chunk_length(i) for i in self.received)
+
+    def to_dict(self):
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.filename,
+            'file_size': self.file_size,
+            'chunk_size': self.chunk_size,
+            'sha256': self.sha256,
+            'received': sorted(self.received),
+            'created_at': self.created_at
+        }
+
+    def status(self):
+        received_bytes = self.received_bytes
+        return {
+            'upload_id': self.upload_id,
+            'filename': self.filename,
+            'file_size': self.file_size,
+            'chunk_size': self.chunk_size,
+            'total_chunks': self.total_chunks,
+            'received_chunks': sorted(self.received),
+            'received_bytes': received_bytes,
+            'progress': round(received_bytes / self.file_size * 100, 2) if self.file_size else 100.0,
+            'complete': False
+        }
+
+
+class ChunkedUploadManager:
+    """
+    Upload resumable: initiate -> upload chunk (boleh paralel) -> finalize.
+
+    Chunk di-stream langsung ke offset-nya di file `.part`, jadi memory server
+    tidak bergantung pada ukuran file. Session disimpan di disk supaya upload
+    bisa dilanjutkan setelah server restart.
+
+    Jika client mengirim sha256 yang sudah dikenal server, initiate langsung
+    selesai dan mengembalikan nama file yang sudah ada (tanpa copy), jadi
+    client harus memakai `filename` dari response, bukan nama yang diminta.
+
+    File `.part`, metadata session dan hash index disimpan di `chunk_folder`,
+    di luar `upload_folder` supaya tidak ikut di-serve oleh /uploads/<filename>.
+    Harus berada di filesystem yang sama dengan `upload_folder` (os.replace).
+    """
+
+    def __init__(self, upload_folder, chunk_folder, default_chunk_size=8 * 1024 * 1024,
+                 max_chunk_size=16 * 1024 * 1024, max_file_size=2 * 1024 ** 3,
+                 max_sessions=32, session_ttl=24 * 3600):
+        self.upload_folder = upload_folder
+        self.default_chunk_size = default_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.max_file_size = max_file_size
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+
+        self.chunk_folder = chunk_folder
+        self.hash_index_path = os.path.join(chunk_folder, 'hashes.json')
+        os.makedirs(self.chunk_folder, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._hash_index = self._load_hash_index()
+        self._load_sessions()
+
+    # ---------- Persistence ----------
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.chunk_folder, f"{upload_id}.part")
+
+    def _meta_path(self, upload_id):
+        return os.path.join(self.chunk_folder, f"{upload_id}.json")
+
+    def _write_json(self, path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+
+    def _load_hash_index(self):
+        if not os.path.exists(self.hash_index_path):
+            return {}
+        try:
+            with open(self.hash_index_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load_sessions(self):
+        for name in os.listdir(self.chunk_folder):
+            if not name.endswith('.json') or name == os.path.basename(self.hash_index_path):
+                continue
+            try:
+                with open(os.path.join(self.chunk_folder, name), encoding='utf-8') as f:
+                    session = _UploadSession(**json.load(f))
+            except (OSError, ValueError, TypeError):
+                continue
+            if os.path.exists(self._part_path(session.upload_id)):
+                self._sessions[session.upload_id] = session
+
+    def _remove_session_files(self, upload_id):
+        for path in (self._part_path(upload_id), self._meta_path(upload_id)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def cleanup_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [s for s in self._sessions.values() if now - s.created_at > self.session_ttl]
+            for session in expired:
+                del self._sessions[session.upload_id]
+                self._remove_session_files(session.upload_id)
+        return len(expired)
+
+    # ---------- Hash index (dedup) ----------
+
+    @staticmethod
+    def _fingerprint(path):
+        """Size, mtime dan inode; berubah jika file ditimpa setelah di-hash"""
+        stat = os.stat(path)
+        return [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+    def find_by_hash(self, sha256, file_size=None):
+        entry = self._hash_index.get(sha256)
+        if not isinstance(entry, dict):
+            return None
+
+        path = os.path.join(self.upload_folder, entry['filename'])
+        try:
+            fingerprint = self._fingerprint(path)
+        except OSError:
+            fingerprint = None
+
+        # File sudah ditimpa/dihapus sejak di-hash: entry tidak berlaku lagi
+        if fingerprint != entry.get('fingerprint'):
+            with self._lock:
+                if self._hash_index.get(sha256) is entry:
+                    del self._hash_index[sha256]
+                    self._write_json(self.hash_index_path, self._hash_index)
+            return None
+
+        if file_size is not None and fingerprint[0] != file_size:
+            return None
+        return entry['filename']
+
+    def _remember_hash(self, sha256, filename, fingerprint):
+        """
+        `fingerprint` harus diambil dari file `.part` sebelum os.replace
+        (inode dan mtime tidak berubah), bukan dari path tujuan yang bisa
+        sudah ditimpa request lain
+        """
+        with self._lock:
+            self._hash_index[sha256] = {
+                'filename': filename,
+                'fingerprint': fingerprint
+            }
+            self._write_json(self.hash_index_path, self._hash_index)
+
+    # ---------- Protocol ----------
+
+    def get_session(self, upload_id):
+        session = self._sessions.get(upload_id)
+        if session is None:
+            raise UploadError('Upload session not found', 404)
+        return session
+
+    def initiate(self, filename, file_size, chunk_size=None, sha256=None):
+        filename = os.path.basename(filename or '')
+        if not filename:
+            raise UploadError('Invalid filename')
+
+        file_size = int(file_size)
+        if file_size < 0:
+            raise UploadError('file_size must be >= 0')
+        if file_size > self.max_file_size:
+            raise UploadError(
+                f'File too large. Maximum size is {self.max_file_size / (1024 * 1024):.1f}MB', 413
+            )
+
+        chunk_size = int(chunk_size or self.default_chunk_size)
+        if not (0 < chunk_size <= self.max_chunk_size):
+            raise UploadError(f'chunk_size must be between 1 and {self.max_chunk_size} bytes')
+
+        if sha256 is not None:
+            if not isinstance(sha256, str) or len(sha256) != 64 \
+                    or any(c not in '0123456789abcdef' for c in sha256.lower()):
+                raise UploadError('sha256 must be a 64-character hex string')
+            sha256 = sha256.lower()
+
+        # File dengan hash yang sama sudah ada: selesai tanpa transfer maupun copy
+        existing = self.find_by_hash(sha256, file_size) if sha256 else None
+        if existing:
+            return {
+                'filename': existing,
+                'requested_filename': filename,
+                'file_size': file_size,
+                'sha256': sha256,
+                'complete': True,
+                'deduplicated': True
+            }
+
+        self.cleanup_expired()
+        if len(self._sessions) >= self.max_sessions:
+            raise UploadError('Too many active upload sessions, try again later', 503)
+
+        upload_id = uuid.uuid4().hex
+        session = _UploadSession(upload_id, filename, file_size, chunk_size, sha256)
+
+        # Alokasikan file .part seukuran file akhir, chunk ditulis ke offset-nya
+        with open(self._part_path(upload_id), 'wb') as f:
+            f.truncate(file_size)
+
+        with self._lock:
+            self._sessions[upload_id] = session
+            self._write_json(self._meta_path(upload_id), session.to_dict())
+
+        return session.status()
+
+    def write_chunk(self, upload_id, index, stream, content_length):
+        session = self.get_session(upload_id)
+
+        if not (0 <= index < session.total_chunks):
+            raise UploadError(f'Chunk index must be between 0 and {session.total_chunks - 1}')
+
+        expected = session.chunk_length(index)
+        if content_length is not None and content_length != expected:
+            raise UploadError(f'Chunk {index} must be {expected} bytes, got {content_length}')
+
+        # Chunk yang sudah diterima tidak boleh ditimpa: bisa saja sudah di-hash
+        with session.lock:
+            if index in session.received or index in session.writing:
+                raise UploadError(f'Chunk {index} already received', 409)
+            session.writing.add(index)
+
+        # Tulis di luar lock supaya chunk lain bisa ditulis paralel
+        offset = index * session.chunk_size
+        written = 0
+        try:
+            with open(self._part_path(upload_id), 'r+b') as f:
+                f.seek(offset)
+                while written < expected:
+                    block = stream.read(min(READ_BLOCK_SIZE, expected - written))
+                    if not block:
+                        break
+                    f.write(block)
+                    written += len(block)
+        except FileNotFoundError:
+            with session.lock:
+                session.writing.discard(index)
+            raise UploadError('Upload session not found', 404)
+        except BaseException:
+            with session.lock:
+                session.writing.discard(index)
+            raise
+
+        with session.lock:
+            session.writing.discard(index)
+            if written != expected:
+                raise UploadError(f'Incomplete chunk {index}: received {written} of {expected} bytes')
+            session.received.add(index)
+            self._advance_hash(session)
+            with self._lock:
+                self._write_json(self._meta_path(upload_id), session.to_dict())
+            return session.status()
+
+    def _advance_hash(self, session):
+        """Hash chunk berurutan yang sudah diterima (data masih di page cache)"""
+        if session.hashed_chunks >= session.total_chunks or session.hashed_chunks not in session.received:
+            return
+
+        with open(self._part_path(session.upload_id), 'rb') as f:
+            f.seek(session.hashed_chunks * session.chunk_size)
+            while session.hashed_chunks in session.received:
+                remaining = session.chunk_length(session.hashed_chunks)
+                while remaining > 0:
+                    block = f.read(min(READ_BLOCK_SIZE, remaining))
+                    session.hasher.update(block)
+                    remaining -= len(block)
+                session.hashed_chunks += 1
+
+    def finalize(self, upload_id):
+        session = self.get_session(upload_id)
+
+        with session.lock:
+            missing = [i for i in range(session.total_chunks) if i not in session.received]
+            # File kosong tidak punya chunk untuk diupload
+            if session.file_size == 0:
+                missing = []
+            if missing:
+                raise UploadError(f'Missing {len(missing)} chunks', 409)
+
+            self._advance_hash(session)
+            sha256 = session.hasher.hexdigest()
+            if session.sha256 and session.sha256 != sha256:
+                self.abort(upload_id)
+                raise UploadError('Content hash mismatch, upload discarded', 422)
+
+            part_path = self._part_path(upload_id)
+            fingerprint = self._fingerprint(part_path)
+            target = os.path.join(self.upload_folder, session.filename)
+            os.replace(part_path, target)
+
+            with self._lock:
+                self._sessions.pop(upload_id, None)
+                self._remove_session_files(upload_id)
+
+        # Jika target sudah ditimpa request lain, fingerprint tidak cocok
+        # dan find_by_hash akan membuang entry ini
+        self._remember_hash(sha256, session.filename, fingerprint)
+
+        return {
+            'filename': session.filename,
+            'file_size': session.file_size,
+            'sha256': sha256,
+            'complete': True,
+            'deduplicated': False
+        }
+
+    def abort(self, upload_id):
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+            self._remove_session_files(upload_id)
+        if session is None:
+            raise UploadError('Upload session not found', 404)
@@ -0,0 +1,24 @@
+"""
+Konfigurasi class yang dideteksi. Tidak me-load model apapun, jadi aman
+di-import oleh inference.py maupun tool seperti prune_classes.py.
+"""
+
+# Class yang dideteksi, berdasarkan nama class di model.
+# None = semua class dari model.
+SELECTED_CLASSES = ['car', 'bus', 'truck']
+
+
+def resolve_class_ids(names, selected=None):
+    """
+    Mapping nama class ke class ID sesuai `model.names`.
+    Bekerja untuk model COCO penuh maupun model yang sudah di-prune.
+    """
+    if selected is None:
+        return sorted(names)
+
+    name_to_id = {name: cls_id for cls_id, name in names.items()}
+    missing = [name for name in selected if name not in name_to_id]
+    if missing:
+        raise ValueError(f"Classes not found in model: {', '.join(missing)}")
+
+    return sorted(name_to_id[name] for name in selected)
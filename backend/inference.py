@@ -1,17 +1,32 @@
-from ultralytics import YOLO
 import cv2
 import os
 import time
 import uuid
 from datetime import datetime
+from class_config import SELECTED_CLASSES, resolve_class_ids
 
-model = YOLO('yolov8n.pt')  # Contoh: 'models/best.pt' atau 'yolov8n_custom.pt'
+MODEL_PATH = 'yolov8n.pt'  # Contoh: 'models/best.pt' atau 'yolov8n_3class.pt' (hasil prune_classes.py)
 
-CUSTOM_LABELS = {
-    2: 'car',     # Contoh
-    5: 'bus',    # Contoh
-    7: 'truck'      # Contoh
-}
+# 'ultralytics' (default) atau 'stub' untuk load testing tanpa GPU/weights (lihat stub_model.py)
+INFERENCE_BACKEND = os.environ.get('INFERENCE_BACKEND', 'ultralytics')
+
+if INFERENCE_BACKEND == 'stub':
+    from stub_model import StubModel
+    model = StubModel.from_env()
+    MODEL_NAME = 'stub'
+else:
+    from ultralytics import YOLO
+    model = YOLO(MODEL_PATH)
+    MODEL_NAME = os.path.basename(MODEL_PATH)
+
+# Class ID yang dikirim ke model (NMS hanya memproses class ini)
+CLASS_IDS = resolve_class_ids(model.names, SELECTED_CLASSES)
+
+# Label diambil dari model, bukan di-hardcode
+CUSTOM_LABELS = {cls_id: model.names[cls_id] for cls_id in CLASS_IDS}
+
+# Jika model sudah berisi tepat class yang dipilih, filter di NMS tidak perlu
+MODEL_CLASSES = None if len(CLASS_IDS) == len(model.names) else CLASS_IDS
 
 def run_inference(image_path, conf=0.3, iou=0.5):
     try:
@@ -58,7 +73,7 @@ def run_inference(image_path, conf=0.3, iou=0.5):
                     "file_size": round(os.path.getsize(image_path) / 1024, 2)  # KB
                 },
                 "inference_info": {
-                    "model": "custom_3class_model",
+                    "model": MODEL_NAME,
                     "confidence_threshold": conf,
                     "iou_threshold": iou,
                     "inference_time": 0,  # Tidak ada inference
@@ -87,7 +102,7 @@ def run_inference(image_path, conf=0.3, iou=0.5):
         
         # Run inference
         inference_start = time.time()
-        results = model(img, conf=model_conf, iou=iou)
+        results = model(img, conf=model_conf, iou=iou, classes=MODEL_CLASSES)
         inference_time = time.time() - inference_start
 
         # Extract predictions in the required format
@@ -101,9 +116,8 @@ def run_inference(image_path, conf=0.3, iou=0.5):
                 cls_id = int(box.cls[0])
                 conf_score = float(box.conf[0])
                 
-                # Validasi class ID (hanya 0, 1, 2 untuk 3 class)
+                # Class sudah difilter di NMS lewat `classes`, ini hanya pengaman
                 if cls_id not in CUSTOM_LABELS:
-                    print(f"Warning: Detected unknown class ID {cls_id}, skipping...")
                     continue
                 
                 # ✅ PERBAIKAN: Filter yang lebih strict
@@ -175,7 +189,7 @@ def run_inference(image_path, conf=0.3, iou=0.5):
                 "file_size": round(os.path.getsize(image_path) / 1024, 2)  # KB
             },
             "inference_info": {
-                "model": "custom_3class_model",  # Update sesuai nama model Anda
+                "model": MODEL_NAME,
                 "confidence_threshold": conf,
                 "iou_threshold": iou,
                 "inference_time": round(inference_time * 1000, 2),  # milliseconds
@@ -256,13 +270,16 @@ def get_model_info():
     Mengembalikan informasi tentang model custom yang digunakan
     """
     return {
-        "model_name": "Custom YOLOv8 Model",
+        "model_name": "Stub Model (simulated latency)" if INFERENCE_BACKEND == 'stub' else "Custom YOLOv8 Model",
         "model_type": "Object Detection",
         "classes": list(CUSTOM_LABELS.values()),
         "total_classes": len(CUSTOM_LABELS),
         "class_mapping": CUSTOM_LABELS,
+        "model_path": None if INFERENCE_BACKEND == 'stub' else MODEL_PATH,
+        "backend": INFERENCE_BACKEND,
+        "model_total_classes": len(model.names),
         "input_size": "640x640",  # Update jika berbeda
-        "framework": "Ultralytics",
+        "framework": "Stub" if INFERENCE_BACKEND == 'stub' else "Ultralytics",
         "output_format": "xywh_with_confidence"
     }
 
@@ -277,8 +294,7 @@ def verify_model():
     # Coba ambil nama class dari model
     if hasattr(model, 'names'):
         print(f"Model class names: {model.names}")
-    else:
-        print(f"Using custom labels: {CUSTOM_LABELS}")
+    print(f"Selected classes: {CUSTOM_LABELS}")
     
     print("========================")
 
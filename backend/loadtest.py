@@ -0,0 +1,389 @@
+"""
+Load testing untuk app.py: virtual user menjalankan /upload -> /inference
+plus event Socket.IO `set_threshold` dan `get_status`.
+
+Setiap step di sweep dijalankan selama --duration detik, hasilnya berupa
+kurva throughput vs latency (saturation curve) dan error rate per step.
+
+Contoh:
+    # Server terpisah lewat network (jalankan server dengan stub model dulu)
+    INFERENCE_BACKEND=stub STUB_LATENCY_MS=40 python app.py
+    python loadtest.py --url http://localhost:5000 --concurrency 1,2,4,8,16
+
+    # In-process (Flask test client, tanpa network), open-loop arrival rate
+    python loadtest.py --in-process --stub-latency-ms 40 --rates 5,10,20,40
+
+Mode closed-loop (--concurrency): N virtual user berjalan terus menerus.
+Mode open-loop (--rates): session datang dengan distribusi Poisson; latency
+dihitung dari waktu kedatangan terjadwal sehingga antrian di client ikut terukur.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+OPERATIONS = ['session', 'upload', 'inference', 'set_threshold', 'get_status']
+
+# Status yang berarti request sengaja ditolak oleh admission control
+SHED_STATUS = {429, 503}
+
+
+class HttpTarget:
+    """Virtual user yang bicara dengan server lewat HTTP dan Socket.IO client"""
+
+    def __init__(self, url, timeout):
+        import requests
+        import socketio
+
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        self._status_event = threading.Event()
+        self._threshold_event = threading.Event()
+        self._expected_confidence = None
+
+        self.sio = socketio.Client(reconnection=False)
+        self.sio.on('status_update', lambda data: self._status_event.set())
+        self.sio.on('thresholds_updated', self._on_thresholds_updated)
+        self.sio.connect(self.url, transports=['websocket'], wait_timeout=timeout)
+
+    def _on_thresholds_updated(self, data):
+        if self._expected_confidence is None or data.get('confidence') == self._expected_confidence:
+            self._threshold_event.set()
+
+    def upload(self, filename, payload):
+        response = self.session.post(
+            f"{self.url}/upload",
+            files={'file': (filename, payload)},
+            timeout=self.timeout
+        )
+        return response.status_code
+
+    def inference(self, body, headers):
+        response = self.session.post(
+            f"{self.url}/inference", json=body, headers=headers, timeout=self.timeout
+        )
+        return response.status_code
+
+    def set_threshold(self, confidence):
+        self._threshold_event.clear()
+        self._expected_confidence = confidence
+        self.sio.emit('set_threshold', {'confidence': confidence})
+        return 200 if self._threshold_event.wait(self.timeout) else 0
+
+    def get_status(self):
+        self._status_event.clear()
+        self.sio.emit('get_status')
+        return 200 if self._status_event.wait(self.timeout) else 0
+
+    def close(self):
+        self.sio.disconnect()
+        self.session.close()
+
+
+class InProcessTarget:
+    """
+    Virtual user yang memanggil app langsung lewat Flask/Socket.IO test client,
+    untuk mengukur overhead server tanpa network
+    """
+
+    def __init__(self, app, socketio):
+        self.client = app.test_client()
+        self.sio = socketio.test_client(app)
+
+    def upload(self, filename, payload):
+        from io import BytesIO
+
+        response = self.client.post(
+            '/upload',
+            data={'file': (BytesIO(payload), filename)},
+            content_type='multipart/form-data'
+        )
+        return response.status_code
+
+    def inference(self, body, headers):
+        response = self.client.post('/inference', json=body, headers=headers)
+        return response.status_code
+
+    def _emit(self, event, *args, expect):
+        self.sio.emit(event, *args)
+        received = self.sio.get_received()
+        return 200 if any(message['name'] == expect for message in received) else 0
+
+    def set_threshold(self, confidence):
+        return self._emit('set_threshold', {'confidence': confidence}, expect='thresholds_updated')
+
+    def get_status(self):
+        return self._emit('get_status', expect='status_update')
+
+    def close(self):
+        self.sio.disconnect()
+
+
+class Recorder:
+    """Kumpulkan hasil per operasi untuk satu step"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {op: [] for op in OPERATIONS}
+
+    def add(self, op, latency, status):
+        with self._lock:
+            self.samples[op].append((latency, status))
+
+
+def _percentile(values, pct):
+    if not values:
+        return 0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(recorder, elapsed):
+    summary = {}
+    for op, samples in recorder.samples.items():
+        ok = sorted(latency for latency, status in samples if 200 <= status < 300)
+        shed = sum(1 for _, status in samples if status in SHED_STATUS)
+        errors = len(samples) - len(ok) - shed
+        summary[op] = {
+            'count': len(samples),
+            'throughput': round(len(ok) / elapsed, 2) if elapsed else 0,
+            'p50_ms': round(_percentile(ok, 50) * 1000, 2),
+            'p95_ms': round(_percentile(ok, 95) * 1000, 2),
+            'p99_ms': round(_percentile(ok, 99) * 1000, 2),
+            'max_ms': round(ok[-1] * 1000, 2) if ok else 0,
+            'error_rate': round(errors / len(samples), 4) if samples else 0,
+            'shed_rate': round(shed / len(samples), 4) if samples else 0
+        }
+    return summary
+
+
+class Scenario:
+    """Satu session virtual user: upload -> inference, lalu event Socket.IO"""
+
+    def __init__(self, payload, extension, conf, iou, socket_ratio, deadline):
+        self.payload = payload
+        self.extension = extension
+        self.conf = conf
+        self.iou = iou
+        self.socket_ratio = socket_ratio
+        self.deadline = deadline
+
+    def run(self, target, user_id, recorder, scheduled_at=None):
+        session_start = scheduled_at if scheduled_at is not None else time.perf_counter()
+        filename = f"loadtest_vu{user_id}.{self.extension}"
+        session_status = 200
+
+        def timed(op, fn, *args):
+            start = time.perf_counter()
+            try:
+                status = fn(*args)
+            except Exception:
+                status = 0
+            recorder.add(op, time.perf_counter() - start, status)
+            return status
+
+        status = timed('upload', target.upload, filename, self.payload)
+        if not 200 <= status < 300:
+            session_status = status
+        else:
+            body = {'filename': filename, 'conf': self.conf, 'iou': self.iou}
+            if self.deadline is not None:
+                body['deadline'] = self.deadline
+            status = timed('inference', target.inference, body, {'X-Client-Id': f"vu{user_id}"})
+            if not 200 <= status < 300:
+                session_status = status
+
+        if random.random() < self.socket_ratio:
+            timed('set_threshold', target.set_threshold, round(random.uniform(0.1, 0.9), 3))
+            timed('get_status', target.get_status)
+
+        recorder.add('session', time.perf_counter() - session_start, session_status)
+
+
+def run_closed_loop(make_target, scenario, users, duration, warmup, think_time):
+    recorder = Recorder()
+    stop_at = time.perf_counter() + warmup + duration
+    measure_from = time.perf_counter() + warmup
+
+    def user_loop(user_id):
+        target = make_target()
+        warm = Recorder()
+        try:
+            while time.perf_counter() < stop_at:
+                active = recorder if time.perf_counter() >= measure_from else warm
+                scenario.run(target, user_id, active)
+                if think_time:
+                    time.sleep(random.expovariate(1 / think_time))
+        finally:
+            target.close()
+
+    threads = [threading.Thread(target=user_loop, args=(i,), daemon=True) for i in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return recorder
+
+
+def run_open_loop(make_target, scenario, rate, duration, warmup, max_users):
+    recorder = Recorder()
+    warm = Recorder()
+    local = threading.local()
+    targets = []
+    targets_lock = threading.Lock()
+    next_id = iter(range(max_users))
+
+    def session(scheduled_at, measured):
+        if not hasattr(local, 'target'):
+            local.user_id = next(next_id)
+            local.target = make_target()
+            with targets_lock:
+                targets.append(local.target)
+        scenario.run(local.target, local.user_id, recorder if measured else warm, scheduled_at)
+
+    with ThreadPoolExecutor(max_workers=max_users) as executor:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+        scheduled_at = start
+
+        while True:
+            scheduled_at += random.expovariate(rate)
+            if scheduled_at >= stop_at:
+                break
+            delay = scheduled_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(session, scheduled_at, scheduled_at >= measure_from)
+
+    for target in targets:
+        target.close()
+
+    return recorder
+
+
+def print_table(rows):
+    header = f"{'load':>8} {'thrpt/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'err %':>7} {'shed %':>7}"
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        session = row['operations']['session']
+        print(f"{row['load']:>8} {session['throughput']:>9} {session['p50_ms']:>9} "
+              f"{session['p95_ms']:>9} {session['p99_ms']:>9} "
+              f"{session['error_rate'] * 100:>7.2f} {session['shed_rate'] * 100:>7.2f}")
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['mode', 'load', 'operation', 'count', 'throughput', 'p50_ms',
+                         'p95_ms', 'p99_ms', 'max_ms', 'error_rate', 'shed_rate'])
+        for row in rows:
+            for op, stats in row['operations'].items():
+                writer.writerow([row['mode'], row['load'], op, stats['count'], stats['throughput'],
+                                 stats['p50_ms'], stats['p95_ms'], stats['p99_ms'],
+                                 stats['max_ms'], stats['error_rate'], stats['shed_rate']])
+
+
+def _parse_list(value, cast):
+    return [cast(v) for v in value.split(',') if v.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the YOLO inference server')
+    target_group = parser.add_mutually_exclusive_group()
+    target_group.add_argument('--url', default='http://localhost:5000', help='Server base URL')
+    target_group.add_argument('--in-process', action='store_true',
+                              help='Drive app.py in-process with the Flask test client (no network)')
+    load_group = parser.add_mutually_exclusive_group()
+    load_group.add_argument('--concurrency', type=lambda v: _parse_list(v, int),
+                            help='Closed-loop sweep: comma-separated virtual user counts')
+    load_group.add_argument('--rates', type=lambda v: _parse_list(v, float),
+                            help='Open-loop sweep: comma-separated session arrival rates (per second)')
+    parser.add_argument('--duration', type=float, default=30, help='Measured seconds per step')
+    parser.add_argument('--warmup', type=float, default=5, help='Unmeasured seconds before each step')
+    parser.add_argument('--think-time', type=float, default=0,
+                        help='Mean think time between sessions in closed-loop mode (seconds)')
+    parser.add_argument('--max-users', type=int, default=64,
+                        help='Maximum concurrent sessions in open-loop mode')
+    parser.add_argument('--file', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      'static', 'images.jpg'),
+                        help='Image uploaded by every virtual user')
+    parser.add_argument('--conf', type=float, default=0.3)
+    parser.add_argument('--iou', type=float, default=0.5)
+    parser.add_argument('--deadline', type=float, help='Per-request inference deadline (seconds)')
+    parser.add_argument('--socket-ratio', type=float, default=0.2,
+                        help='Fraction of sessions that also send set_threshold and get_status')
+    parser.add_argument('--timeout', type=float, default=60, help='Client timeout (seconds)')
+    parser.add_argument('--stub-latency-ms', type=float,
+                        help='In-process only: use the stub model with this simulated latency')
+    parser.add_argument('--stub-jitter-ms', type=float, default=0)
+    parser.add_argument('--output', help='Write results as JSON')
+    parser.add_argument('--csv', help='Write per-operation results as CSV')
+    args = parser.parse_args(argv)
+
+    if not args.concurrency and not args.rates:
+        args.concurrency = [1, 2, 4, 8]
+
+    with open(args.file, 'rb') as f:
+        payload = f.read()
+    extension = os.path.splitext(args.file)[1].lstrip('.').lower()
+
+    if args.in_process:
+        if args.stub_latency_ms is not None:
+            # Harus di-set sebelum app/inference di-import
+            os.environ['INFERENCE_BACKEND'] = 'stub'
+            os.environ['STUB_LATENCY_MS'] = str(args.stub_latency_ms)
+            os.environ['STUB_LATENCY_JITTER_MS'] = str(args.stub_jitter_ms)
+        from app import app, socketio
+
+        def make_target():
+            return InProcessTarget(app, socketio)
+    else:
+        def make_target():
+            return HttpTarget(args.url, args.timeout)
+
+    scenario = Scenario(payload, extension, args.conf, args.iou, args.socket_ratio, args.deadline)
+
+    rows = []
+    mode = 'closed' if args.concurrency else 'open'
+    for load in (args.concurrency or args.rates):
+        print(f"Running {mode}-loop step: {load} {'users' if mode == 'closed' else 'sessions/s'} "
+              f"for {args.duration:.0f}s (+{args.warmup:.0f}s warmup)...")
+        start = time.perf_counter()
+        if mode == 'closed':
+            recorder = run_closed_loop(make_target, scenario, load, args.duration,
+                                       args.warmup, args.think_time)
+        else:
+            recorder = run_open_loop(make_target, scenario, load, args.duration,
+                                     args.warmup, args.max_users)
+        # Open-loop bisa selesai lebih lama dari durasi karena session yang masih jalan
+        elapsed = max(args.duration, time.perf_counter() - start - args.warmup)
+        rows.append({
+            'mode': mode,
+            'load': load,
+            'operations': summarize(recorder, elapsed)
+        })
+
+    print()
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2)
+    if args.csv:
+        write_csv(args.csv, rows)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
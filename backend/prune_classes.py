@@ -0,0 +1,82 @@
+"""
+Export model YOLOv8 dengan detection head yang hanya berisi class terpilih.
+
+Contoh:
+    python prune_classes.py yolov8n.pt yolov8n_3class.pt --classes car bus truck
+
+Class score untuk class lain tidak dihitung sama sekali, jadi head dan NMS
+lebih ringan. Label di model hasil export diambil dari `model.names` asli,
+lalu set `MODEL_PATH` di inference.py ke file hasil export.
+"""
+import argparse
+
+import torch
+from torch import nn
+from ultralytics import YOLO
+
+from class_config import SELECTED_CLASSES, resolve_class_ids
+
+
+def _prune_cls_branch(branch, class_ids):
+    """Potong output channel conv terakhir di cabang klasifikasi"""
+    conv = branch[-1]
+    index = torch.tensor(class_ids, dtype=torch.long)
+
+    pruned = nn.Conv2d(conv.in_channels, len(class_ids), conv.kernel_size,
+                       conv.stride, conv.padding, bias=conv.bias is not None)
+    with torch.no_grad():
+        pruned.weight.copy_(conv.weight[index])
+        if conv.bias is not None:
+            pruned.bias.copy_(conv.bias[index])
+
+    branch[-1] = pruned.to(conv.weight.device, conv.weight.dtype)
+
+
+def prune_detection_head(yolo, class_ids):
+    """
+    Prune detection head `yolo` (in-place) ke `class_ids`.
+    Class ID baru berurutan 0..n-1 sesuai urutan `class_ids`.
+    """
+    names = yolo.model.names
+    detect = yolo.model.model[-1]
+
+    for branch in detect.cv3:
+        _prune_cls_branch(branch, class_ids)
+    # Head end-to-end (versi ultralytics yang lebih baru)
+    for branch in getattr(detect, 'one2one_cv3', None) or []:
+        _prune_cls_branch(branch, class_ids)
+
+    detect.nc = len(class_ids)
+    detect.no = detect.nc + detect.reg_max * 4
+
+    yolo.model.nc = detect.nc
+    yolo.model.names = {new_id: names[old_id] for new_id, old_id in enumerate(class_ids)}
+    if isinstance(getattr(yolo.model, 'yaml', None), dict):
+        yolo.model.yaml['nc'] = detect.nc
+
+    return yolo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export a YOLOv8 model pruned to a class subset')
+    parser.add_argument('source', help='Source model (.pt)')
+    parser.add_argument('output', help='Output model (.pt)')
+    parser.add_argument('--classes', nargs='+',
+                        help='Class names to keep (default: SELECTED_CLASSES from class_config.py)')
+    args = parser.parse_args(argv)
+
+    yolo = YOLO(args.source)
+
+    selected = SELECTED_CLASSES if args.classes is None else args.classes
+
+    class_ids = resolve_class_ids(yolo.model.names, selected)
+    prune_detection_head(yolo, class_ids)
+    yolo.save(args.output)
+
+    print(f"Saved pruned model to {args.output}")
+    for cls_id, name in yolo.model.names.items():
+        print(f"{cls_id}: {name}")
+
+
+if __name__ == '__main__':
+    main()
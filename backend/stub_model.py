@@ -0,0 +1,104 @@
+"""
+Stand-in untuk `inference.model` supaya server bisa di-load test tanpa GPU,
+weights, atau akses network.
+
+Aktifkan dengan environment variable sebelum menjalankan server:
+    INFERENCE_BACKEND=stub STUB_LATENCY_MS=40 python app.py
+
+Konfigurasi (environment variable):
+    STUB_LATENCY_MS         rata-rata latency inference simulasi (default 30)
+    STUB_LATENCY_JITTER_MS  standar deviasi latency (default 0)
+    STUB_DETECTIONS         jumlah box per gambar sebelum filter (default 5)
+    STUB_BUSY               1 = busy-wait (pakai CPU dan GIL), 0 = sleep (default 0)
+    STUB_SEED               seed random untuk hasil yang reproducible
+"""
+import os
+import random
+import time
+
+# Nama class COCO, sama dengan yolov8n.pt
+COCO_NAMES = [
+    'person', 'bicycle', 'car', 'motorcycle', 'airplane', 'bus', 'train', 'truck', 'boat',
+    'traffic light', 'fire hydrant', 'stop sign', 'parking meter', 'bench', 'bird', 'cat',
+    'dog', 'horse', 'sheep', 'cow', 'elephant', 'bear', 'zebra', 'giraffe', 'backpack',
+    'umbrella', 'handbag', 'tie', 'suitcase', 'frisbee', 'skis', 'snowboard', 'sports ball',
+    'kite', 'baseball bat', 'baseball glove', 'skateboard', 'surfboard', 'tennis racket',
+    'bottle', 'wine glass', 'cup', 'fork', 'knife', 'spoon', 'bowl', 'banana', 'apple',
+    'sandwich', 'orange', 'broccoli', 'carrot', 'hot dog', 'pizza', 'donut', 'cake', 'chair',
+    'couch', 'potted plant', 'bed', 'dining table', 'toilet', 'tv', 'laptop', 'mouse',
+    'remote', 'keyboard', 'cell phone', 'microwave', 'oven', 'toaster', 'sink',
+    'refrigerator', 'book', 'clock', 'vase', 'scissors', 'teddy bear', 'hair drier',
+    'toothbrush'
+]
+
+
+class StubBox:
+    """Meniru satu elemen `Results.boxes` (cls, conf, xyxy berbentuk batch 1)"""
+
+    def __init__(self, cls_id, conf, xyxy):
+        self.cls = [cls_id]
+        self.conf = [conf]
+        self.xyxy = [xyxy]
+
+
+class StubResult:
+    def __init__(self, boxes, orig_shape):
+        self.boxes = boxes
+        self.orig_shape = orig_shape
+
+
+class StubModel:
+    """
+    Model palsu dengan interface call yang sama seperti `ultralytics.YOLO`:
+    `model(img, conf=..., iou=..., classes=...)` -> list berisi satu result
+    """
+
+    def __init__(self, latency_ms=30.0, jitter_ms=0.0, detections=5, busy=False,
+                 names=None, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.detections = detections
+        self.busy = busy
+        self.names = names or dict(enumerate(COCO_NAMES))
+        self.nc = len(self.names)
+        self.model = self  # verify_model() membaca model.model
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls):
+        seed = os.environ.get('STUB_SEED')
+        return cls(
+            latency_ms=float(os.environ.get('STUB_LATENCY_MS', 30)),
+            jitter_ms=float(os.environ.get('STUB_LATENCY_JITTER_MS', 0)),
+            detections=int(os.environ.get('STUB_DETECTIONS', 5)),
+            busy=os.environ.get('STUB_BUSY', '0') == '1',
+            seed=int(seed) if seed is not None else None
+        )
+
+    def _simulate_latency(self):
+        latency = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+        if self.busy:
+            end = time.perf_counter() + latency
+            while time.perf_counter() < end:
+                pass
+        else:
+            time.sleep(latency)
+
+    def __call__(self, img, conf=0.25, iou=0.7, classes=None, **kwargs):
+        self._simulate_latency()
+
+        height, width = img.shape[:2]
+        class_ids = list(classes) if classes is not None else list(self.names)
+
+        boxes = []
+        for _ in range(self.detections):
+            score = self._random.uniform(0.05, 0.99)
+            if score < conf:
+                continue
+            x1 = self._random.uniform(0, width * 0.8)
+            y1 = self._random.uniform(0, height * 0.8)
+            x2 = min(width, x1 + self._random.uniform(10, width * 0.2))
+            y2 = min(height, y1 + self._random.uniform(10, height * 0.2))
+            boxes.append(StubBox(self._random.choice(class_ids), score, [x1, y1, x2, y2]))
+
+        return [StubResult(boxes, (height, width))]